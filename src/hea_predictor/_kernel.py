@@ -0,0 +1,75 @@
+import numpy as np
+
+# Fused reduction for batch mode. When numba is installed the per-row loop below is
+# JIT-compiled; otherwise the same results come from NumPy matrix-vector products.
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def _batch_properties_numpy(F, mass, volume, lattice, conductivity, lattice_ok, conductivity_ok):
+    """NumPy fallback for batch_properties."""
+    present = F > 0
+    molar_mass = F @ mass
+    molar_volume = F @ volume
+    density_ok = (molar_mass > 0) & (molar_volume > 0)
+    density = np.where(density_ok, molar_mass / np.where(density_ok, molar_volume, 1.0), np.nan)
+
+    lattice_mix = F @ lattice
+    lattice_mix[~(present & lattice_ok).any(axis=1)] = np.nan
+    conductivity_mix = F @ conductivity
+    conductivity_mix[~(present & conductivity_ok).any(axis=1)] = np.nan
+    return density, lattice_mix, conductivity_mix
+
+
+def _batch_properties_loop(F, mass, volume, lattice, conductivity, lattice_ok, conductivity_ok):
+    """One pass over each composition row; accumulators stay in registers, no temporaries."""
+    n_rows, n_elements = F.shape
+    density = np.empty(n_rows)
+    lattice_mix = np.empty(n_rows)
+    conductivity_mix = np.empty(n_rows)
+    for i in prange(n_rows):
+        molar_mass = 0.0
+        molar_volume = 0.0
+        a = 0.0
+        k = 0.0
+        has_lattice = False
+        has_conductivity = False
+        for j in range(n_elements):
+            x = F[i, j]
+            molar_mass += x * mass[j]
+            molar_volume += x * volume[j]
+            a += x * lattice[j]
+            k += x * conductivity[j]
+            if x > 0:
+                has_lattice |= lattice_ok[j]
+                has_conductivity |= conductivity_ok[j]
+        density[i] = molar_mass / molar_volume if molar_mass > 0 and molar_volume > 0 else np.nan
+        lattice_mix[i] = a if has_lattice else np.nan
+        conductivity_mix[i] = k if has_conductivity else np.nan
+    return density, lattice_mix, conductivity_mix
+
+
+# NaNs are only written, never tested, so fastmath's no-NaN assumption is safe here
+_batch_properties_jit = njit(parallel=True, fastmath=True, cache=True)(_batch_properties_loop) if njit else None
+
+
+def batch_properties(F, mass, volume, lattice, conductivity, lattice_ok, conductivity_ok):
+    """
+    Computes density, Vegard lattice parameter and thermal conductivity for every row of F.
+
+    Args:
+        F (np.ndarray): (batch, n_elements) atomic fractions.
+        mass, volume (np.ndarray): Atomic mass and molar volume (mass / density) per element,
+                                   pre-zeroed where the density data is unusable.
+        lattice, conductivity (np.ndarray): Per-element properties, pre-zeroed where invalid.
+        lattice_ok, conductivity_ok (np.ndarray): Boolean validity of lattice / conductivity.
+
+    Returns:
+        tuple: (density, lattice_mix, conductivity_mix) float arrays of length batch.
+               Rows without a usable contribution are NaN.
+    """
+    kernel = _batch_properties_jit or _batch_properties_numpy
+    return kernel(F, mass, volume, lattice, conductivity, lattice_ok, conductivity_ok)
@@ -1,160 +1,356 @@
-import pandas as pd
 import numpy as np
 import sys
+from collections import namedtuple
+from .data_loader import ElementTable
 
 # --- Constants ---
 AVOGADRO_NUMBER = 6.02214076e23  # atoms/mol
 
-def calculate_density_rom(composition, element_data):
+_THERMAL_NOTE = "Warning: Thermal conductivity prediction uses a simple linear average (Sum xi*ki), which is a VERY rough estimate for alloys and ignores scattering effects."
+
+# Calculators never write to stderr themselves: diagnostics are returned to the caller as a
+# list of strings. Pass verbose=True to have them written to stderr in a single call instead.
+
+# Result of calculate_all_properties.
+PropertyResults = namedtuple('PropertyResults', ['density', 'lattice', 'structures', 'thermal_k', 'warnings'])
+
+# Result of calculate_batch_properties: one array entry per composition row.
+BatchResults = namedtuple('BatchResults', ['density', 'lattice', 'structures', 'thermal_k', 'warnings'])
+
+
+def _report(messages, verbose):
+    """Writes the collected diagnostics to stderr in one call when verbose is set."""
+    if verbose and messages:
+        sys.stderr.write("\n".join(messages) + "\n")
+    return messages
+
+
+def _as_table(element_data):
     """
-    Calculates the theoretical density using a rule-of-mixtures based on molar volume.
-    Density = M_mix / Vm_mix
-    Vm_mix = Sum(xi * Vm_i)
-    Vm_i = Mi / rho_i
+    Returns element_data as an ElementTable. A legacy DataFrame is converted on every call;
+    it may be the shared cached frame, so nothing is stored on it.
+    """
+    if isinstance(element_data, ElementTable):
+        return element_data
+    return ElementTable.from_dataframe(element_data)
 
-    Args:
-        composition (dict): {element_symbol: atomic_fraction}.
-        element_data (pd.DataFrame): DataFrame with element properties, indexed by symbol.
+
+def _locate(symbols, table, messages):
+    """
+    Maps element symbols to their rows in the table.
 
     Returns:
-        float: Predicted density in g/cm³, or None if calculation fails.
+        np.ndarray: Row indices aligned with symbols, or None if any element is missing
+                    from the property data.
     """
-    total_molar_volume = 0.0
-    total_molar_mass = 0.0
-    missing_data_elements = []
+    idx = [table.sym_to_idx.get(element, -1) for element in symbols]
+    missing = [element for element, i in zip(symbols, idx) if i < 0]
+    for element in missing:
+        messages.append(f"Error: Element '{element}' not found in property data.")
+    return None if missing else np.array(idx, dtype=np.intp)
 
-    for element, fraction in composition.items():
-        if element not in element_data.index:
-            print(f"Error: Element '{element}' not found in property data.", file=sys.stderr)
-            return None
 
-        props = element_data.loc[element]
-        atomic_mass = props['AtomicMass_amu']
-        density = props['Density_g_cm3']
+def _fractions(composition):
+    """Atomic fractions as a float array aligned with the composition order."""
+    return np.fromiter(composition.values(), dtype=np.float64, count=len(composition))
 
-        if pd.isna(atomic_mass) or pd.isna(density):
-            missing_data_elements.append(f"{element} (mass or density)")
-            continue
-        if density <= 0:
-             print(f"Warning: Density for element {element} is non-positive ({density}). Skipping its contribution to density.", file=sys.stderr)
-             continue # Avoid division by zero or nonsensical results
 
-        molar_volume = atomic_mass / density  # cm³/mol
-        total_molar_volume += fraction * molar_volume
-        total_molar_mass += fraction * atomic_mass
+# --- Per-element diagnostics, shared by the single-composition and batch paths ---
 
+def _density_messages(symbols, density, has_data, valid, messages):
+    """Reports elements with non-positive density or missing mass/density data."""
+    non_positive = has_data & ~valid
+    for element, value in zip(symbols[non_positive], density[non_positive]):
+        messages.append(f"Warning: Density for element {element} is non-positive ({value}). Skipping its contribution to density.")
+    missing_data_elements = [f"{element} (mass or density)" for element in symbols[~has_data]]
     if missing_data_elements:
-        print(f"Warning: Missing atomic mass or density data for: {', '.join(missing_data_elements)}. Density prediction might be inaccurate.", file=sys.stderr)
+        messages.append(f"Warning: Missing atomic mass or density data for: {', '.join(missing_data_elements)}. Density prediction might be inaccurate.")
 
-    if total_molar_volume <= 0:
-        print(f"Error: Calculated total molar volume is non-positive ({total_molar_volume:.4f}). Cannot calculate density.", file=sys.stderr)
-        return None
-    if total_molar_mass <= 0:
-         print(f"Error: Calculated total molar mass is non-positive ({total_molar_mass:.4f}). Cannot calculate density.", file=sys.stderr)
-         return None
 
+def _lattice_messages(symbols, valid, has_structure, messages):
+    """Reports elements with missing or invalid lattice parameter/structure data. Returns True if any."""
+    missing_data_elements = [
+        f"{element} (lattice param)" if not ok else f"{element} (structure)"
+        for element, ok, known in zip(symbols, valid, has_structure)
+        if not ok or not known
+    ]
+    if missing_data_elements:
+        messages.append(f"Warning: Missing or invalid lattice parameter/structure data for: {', '.join(missing_data_elements)}. Lattice parameter prediction might be inaccurate.")
+    return bool(missing_data_elements)
 
-    predicted_density = total_molar_mass / total_molar_volume
-    return predicted_density
 
+def _mixed_structures_message(detail):
+    """Warning for mixed crystal structures; detail names them or counts the affected rows."""
+    return f"Warning: Constituent elements have different crystal structures {detail}. Vegard's Law prediction assumes an 'average' but is physically less meaningful."
 
-def calculate_lattice_parameter_vegard(composition, element_data):
-    """
-    Calculates the theoretical lattice parameter 'a' using Vegard's Law.
-    a_mix = Sum(xi * a_i)
 
-    Args:
-        composition (dict): {element_symbol: atomic_fraction}.
-        element_data (pd.DataFrame): DataFrame with element properties, indexed by symbol.
+def _undefined_structures_message(where):
+    """Warning for contributing elements without any crystal structure."""
+    return f"Warning: Crystal structures for contributing elements are undefined {where}. Vegard's Law applicability is unknown."
 
-    Returns:
-        tuple: (predicted_lattice_param_A, list_of_structures, warning_issued)
-               Returns (None, [], True) if calculation fails.
-               warning_issued is True if structures differ or data is missing.
-    """
-    predicted_lattice_param = 0.0
-    structures = set()
-    contributing_elements = 0
-    warning_issued = False
-    missing_data_elements = []
 
-    for element, fraction in composition.items():
-        if element not in element_data.index:
-            print(f"Error: Element '{element}' not found in property data.", file=sys.stderr)
-            return None, [], True # Indicate failure
+def _thermal_messages(symbols, valid, messages):
+    """Reports elements with missing thermal conductivity data."""
+    missing_data_elements = [f"{element} (conductivity)" for element in symbols[~valid]]
+    if missing_data_elements:
+        messages.append(f"Warning: Missing thermal conductivity data for: {', '.join(missing_data_elements)}. Prediction might be inaccurate.")
+
+
+def _density_kernel(symbols, fractions, mass, density, messages):
+    """Density RoM on pre-gathered arrays. See calculate_density_rom."""
+    has_data = np.isfinite(mass) & np.isfinite(density)
+    valid = has_data & (density > 0) # Avoid division by zero or nonsensical results
+    _density_messages(symbols, density, has_data, valid, messages)
+
+    # Invalid lanes contribute zero mass; the safe divisor keeps them finite
+    mass_safe = np.where(valid, mass, 0.0)
+    density_safe = np.where(valid, density, 1.0)
+    total_molar_mass = float(fractions @ mass_safe)
+    total_molar_volume = float(fractions @ (mass_safe / density_safe))  # cm³/mol
 
-        props = element_data.loc[element]
-        lattice_param = props['LatticeParameter_a_A']
-        structure = props['CrystalStructure']
+    if total_molar_volume <= 0:
+        messages.append(f"Error: Calculated total molar volume is non-positive ({total_molar_volume:.4f}). Cannot calculate density.")
+        return None
+    if total_molar_mass <= 0:
+        messages.append(f"Error: Calculated total molar mass is non-positive ({total_molar_mass:.4f}). Cannot calculate density.")
+        return None
 
-        if pd.isna(lattice_param) or lattice_param <= 0:
-            missing_data_elements.append(f"{element} (lattice param)")
-            continue # Skip elements with missing/invalid data
+    return total_molar_mass / total_molar_volume
 
-        predicted_lattice_param += fraction * lattice_param
-        if pd.notna(structure):
-            structures.add(str(structure).upper()) # Store unique structures found
-        else:
-            missing_data_elements.append(f"{element} (structure)")
-        contributing_elements += 1
 
+def _lattice_kernel(symbols, fractions, lattice, structure, messages):
+    """Vegard's Law on pre-gathered arrays. See calculate_lattice_parameter_vegard."""
+    valid = np.isfinite(lattice) & (lattice > 0)
+    has_structure = np.not_equal(structure, None)
+    warning_issued = _lattice_messages(symbols, valid, has_structure, messages)
 
-    if missing_data_elements:
-         print(f"Warning: Missing or invalid lattice parameter/structure data for: {', '.join(missing_data_elements)}. Lattice parameter prediction might be inaccurate.", file=sys.stderr)
-         warning_issued = True
+    predicted_lattice_param = float(fractions @ np.where(valid, lattice, 0.0)) # Invalid lanes contribute zero
+    structures = np.unique(structure[valid & has_structure]).tolist() # Unique structures found, sorted
+    contributing_elements = int(valid.sum())
 
     if contributing_elements == 0:
-         print(f"Error: No elements with valid lattice parameter data found in composition.", file=sys.stderr)
-         return None, [], True # Indicate failure
+        messages.append("Error: No elements with valid lattice parameter data found in composition.")
+        return None, [], True # Indicate failure
 
     if len(structures) > 1:
-        print(f"Warning: Constituent elements have different crystal structures ({', '.join(sorted(list(structures)))}). Vegard's Law prediction assumes an 'average' but is physically less meaningful.", file=sys.stderr)
+        messages.append(_mixed_structures_message(f"({', '.join(structures)})"))
         warning_issued = True
-    elif len(structures) == 0 and contributing_elements > 0:
-        print(f"Warning: Crystal structures for contributing elements are undefined in the data. Vegard's Law applicability is unknown.", file=sys.stderr)
+    elif len(structures) == 0:
+        messages.append(_undefined_structures_message("in the data"))
         warning_issued = True
 
+    return predicted_lattice_param, structures, warning_issued
 
-    return predicted_lattice_param, sorted(list(structures)), warning_issued
 
+def _thermal_kernel(symbols, fractions, conductivity, messages):
+    """Linear thermal conductivity RoM on pre-gathered arrays. See calculate_thermal_conductivity_rom."""
+    valid = np.isfinite(conductivity)
+    _thermal_messages(symbols, valid, messages)
 
-def calculate_thermal_conductivity_rom(composition, element_data):
+    if not valid.any():
+        messages.append("Error: No elements with valid thermal conductivity data found in composition.")
+        return None # Indicate failure
+
+    messages.append(_THERMAL_NOTE)
+    return float(fractions @ np.where(valid, conductivity, 0.0)) # Invalid lanes contribute zero
+
+
+def calculate_all_properties(composition, element_data, positions=None, verbose=False):
     """
-    Calculates the thermal conductivity using a simple linear rule-of-mixtures.
-    k_mix = Sum(xi * k_i)
+    Calculates density, lattice parameter and thermal conductivity in a single pass.
+    The element properties are gathered once and shared by all three models.
 
     Args:
         composition (dict): {element_symbol: atomic_fraction}.
-        element_data (pd.DataFrame): DataFrame with element properties, indexed by symbol.
+        element_data (ElementTable): Element property data (a legacy DataFrame is also accepted).
+        positions (array-like, optional): Row indices of the composition elements in
+                                          element_data (ElementTable.sym_to_idx). When given,
+                                          element presence is not re-checked.
+        verbose (bool): Also write the diagnostics to stderr.
 
     Returns:
-        float: Predicted thermal conductivity in W/m·K, or None if calculation fails.
+        PropertyResults: (density, lattice, structures, thermal_k, warnings).
+                         Failed properties are None; structures is a sorted list;
+                         warnings is the list of diagnostic messages.
     """
-    predicted_conductivity = 0.0
-    contributing_elements = 0
-    missing_data_elements = []
+    messages = []
+    table = _as_table(element_data)
+    symbols = np.asarray(list(composition))
+    idx = _locate(symbols, table, messages) if positions is None else np.asarray(positions, dtype=np.intp)
+    if idx is None:
+        return PropertyResults(None, None, [], None, _report(messages, verbose))
+    fractions = _fractions(composition)
 
-    for element, fraction in composition.items():
-        if element not in element_data.index:
-            print(f"Error: Element '{element}' not found in property data.", file=sys.stderr)
-            return None # Indicate failure
+    predicted_density = _density_kernel(symbols, fractions, table.mass[idx], table.density[idx], messages)
+    predicted_lattice_param, structures, _ = _lattice_kernel(symbols, fractions, table.lattice[idx], table.structure[idx], messages)
+    predicted_conductivity = _thermal_kernel(symbols, fractions, table.thermal_k[idx], messages)
 
-        props = element_data.loc[element]
-        conductivity = props['ThermalConductivity_W_mK']
+    return PropertyResults(predicted_density, predicted_lattice_param, structures, predicted_conductivity, _report(messages, verbose))
 
-        if pd.isna(conductivity):
-             missing_data_elements.append(f"{element} (conductivity)")
-             continue # Skip elements with missing data
 
-        predicted_conductivity += fraction * conductivity
-        contributing_elements += 1
+def _structure_labels(present, structure):
+    """
+    Joins the distinct structures present in each row into one label per row and counts them.
+    Rows are encoded as bitmasks over the distinct structures, so only unique masks are joined.
+    """
+    distinct = np.unique(structure[np.not_equal(structure, None)]).tolist()
+    codes = np.zeros(present.shape[0], dtype=np.int64)
+    for bit, name in enumerate(distinct):
+        codes |= (present & (structure == name)).any(axis=1).astype(np.int64) << bit
+    labels = {}
+    counts = {}
+    for code in np.unique(codes):
+        names = [name for bit, name in enumerate(distinct) if code >> bit & 1]
+        labels[code] = ', '.join(names)
+        counts[code] = len(names)
+    return np.array([labels[code] for code in codes], dtype=object), np.array([counts[code] for code in codes])
+
+
+def calculate_batch_properties(fractions, element_data, verbose=False):
+    """
+    Calculates density, lattice parameter and thermal conductivity for many compositions at once.
+    The (batch, n_elements) fraction matrix is reduced against property vectors whose invalid
+    entries are pre-zeroed, in one fused kernel (numba-compiled when numba is installed).
 
-    if missing_data_elements:
-        print(f"Warning: Missing thermal conductivity data for: {', '.join(missing_data_elements)}. Prediction might be inaccurate.", file=sys.stderr)
+    Args:
+        fractions (pd.DataFrame): Atomic fractions, one row per composition, columns are element
+                                  symbols (see data_loader.load_batch_compositions).
+        element_data (ElementTable): Element property data (a legacy DataFrame is also accepted).
+        verbose (bool): Also write the diagnostics to stderr.
+
+    Returns:
+        BatchResults: (density, lattice, structures, thermal_k, warnings); the first four are
+                      arrays with one entry per composition row, failed values are NaN.
+                      They are None if an element is not found in the property data.
+    """
+    from ._kernel import batch_properties
+
+    messages = []
+    table = _as_table(element_data)
+    symbols = np.asarray(fractions.columns, dtype=object)
+    idx = _locate(symbols, table, messages)
+    if idx is None:
+        return BatchResults(None, None, None, None, _report(messages, verbose))
+
+    F = fractions.to_numpy(dtype=np.float64)
+    present = F > 0
+    used = present.any(axis=0)
+    mass, density, lattice, conductivity = table.mass[idx], table.density[idx], table.lattice[idx], table.thermal_k[idx]
+    structure = table.structure[idx]
+
+    # Density: ratio of molar mass to molar volume over elements with usable data
+    has_data = np.isfinite(mass) & np.isfinite(density)
+    mass_ok = has_data & (density > 0)
+    _density_messages(symbols[used], density[used], has_data[used], mass_ok[used], messages)
+
+    # Vegard's Law
+    lattice_ok = np.isfinite(lattice) & (lattice > 0)
+    _lattice_messages(symbols[used], lattice_ok[used], np.not_equal(structure[used], None), messages)
+    structures, structure_counts = _structure_labels(present & lattice_ok, structure)
+
+    # Thermal conductivity
+    conductivity_ok = np.isfinite(conductivity)
+    _thermal_messages(symbols[used], conductivity_ok[used], messages)
+    messages.append(_THERMAL_NOTE)
+
+    # Molar volume is hoisted out of the kernel; invalid lanes are zeroed so they add nothing
+    predicted_density, predicted_lattice, predicted_conductivity = batch_properties(
+        F,
+        np.where(mass_ok, mass, 0.0),
+        np.where(mass_ok, mass / np.where(mass_ok, density, 1.0), 0.0),
+        np.where(lattice_ok, lattice, 0.0),
+        np.where(conductivity_ok, conductivity, 0.0),
+        lattice_ok,
+        conductivity_ok,
+    )
+
+    # Per-row structure diagnostics are aggregated; the Structures column shows each row's set
+    has_lattice = ~np.isnan(predicted_lattice)
+    mixed = int((has_lattice & (structure_counts > 1)).sum())
+    if mixed:
+        messages.append(_mixed_structures_message(f"in {mixed} composition row(s)"))
+    undefined = int((has_lattice & (structure_counts == 0)).sum())
+    if undefined:
+        messages.append(_undefined_structures_message(f"in {undefined} composition row(s)"))
+
+    failed = int(np.isnan(predicted_density).sum() + np.isnan(predicted_lattice).sum() + np.isnan(predicted_conductivity).sum())
+    if failed:
+        messages.append(f"Warning: {failed} property value(s) could not be calculated and are reported as NaN.")
+
+    return BatchResults(predicted_density, predicted_lattice, structures, predicted_conductivity, _report(messages, verbose))
+
+
+def calculate_density_rom(composition, element_data, verbose=False):
+    """
+    Calculates the theoretical density using a rule-of-mixtures based on molar volume.
+    Density = M_mix / Vm_mix
+    Vm_mix = Sum(xi * Vm_i)
+    Vm_i = Mi / rho_i
+
+    Args:
+        composition (dict): {element_symbol: atomic_fraction}.
+        element_data (ElementTable): Element property data (see calculate_all_properties).
+        verbose (bool): Also write the diagnostics to stderr.
+
+    Returns:
+        tuple: (predicted_density, messages). The density is in g/cm³, or None if
+               calculation fails; messages is the list of diagnostic messages.
+    """
+    messages = []
+    table = _as_table(element_data)
+    symbols = np.asarray(list(composition))
+    idx = _locate(symbols, table, messages)
+    if idx is None:
+        return None, _report(messages, verbose)
+    density = _density_kernel(symbols, _fractions(composition), table.mass[idx], table.density[idx], messages)
+    return density, _report(messages, verbose)
 
-    if contributing_elements == 0:
-         print(f"Error: No elements with valid thermal conductivity data found in composition.", file=sys.stderr)
-         return None # Indicate failure
 
-    print("Warning: Thermal conductivity prediction uses a simple linear average (Sum xi*ki), which is a VERY rough estimate for alloys and ignores scattering effects.", file=sys.stderr)
-    return predicted_conductivity
\ No newline at end of file
+def calculate_lattice_parameter_vegard(composition, element_data, verbose=False):
+    """
+    Calculates the theoretical lattice parameter 'a' using Vegard's Law.
+    a_mix = Sum(xi * a_i)
+
+    Args:
+        composition (dict): {element_symbol: atomic_fraction}.
+        element_data (ElementTable): Element property data (see calculate_all_properties).
+        verbose (bool): Also write the diagnostics to stderr.
+
+    Returns:
+        tuple: (predicted_lattice_param_A, list_of_structures, warning_issued, messages)
+               Returns (None, [], True, messages) if calculation fails.
+               warning_issued is True if structures differ or data is missing;
+               messages is the list of diagnostic messages.
+    """
+    messages = []
+    table = _as_table(element_data)
+    symbols = np.asarray(list(composition))
+    idx = _locate(symbols, table, messages)
+    if idx is None:
+        return None, [], True, _report(messages, verbose) # Indicate failure
+    result = _lattice_kernel(symbols, _fractions(composition), table.lattice[idx], table.structure[idx], messages)
+    return (*result, _report(messages, verbose))
+
+
+def calculate_thermal_conductivity_rom(composition, element_data, verbose=False):
+    """
+    Calculates the thermal conductivity using a simple linear rule-of-mixtures.
+    k_mix = Sum(xi * k_i)
+
+    Args:
+        composition (dict): {element_symbol: atomic_fraction}.
+        element_data (ElementTable): Element property data (see calculate_all_properties).
+        verbose (bool): Also write the diagnostics to stderr.
+
+    Returns:
+        tuple: (predicted_conductivity, messages). The conductivity is in W/m·K, or None
+               if calculation fails; messages is the list of diagnostic messages.
+    """
+    messages = []
+    table = _as_table(element_data)
+    symbols = np.asarray(list(composition))
+    idx = _locate(symbols, table, messages)
+    if idx is None:
+        return None, _report(messages, verbose) # Indicate failure
+    conductivity = _thermal_kernel(symbols, _fractions(composition), table.thermal_k[idx], messages)
+    return conductivity, _report(messages, verbose)
@@ -1,15 +1,29 @@
 import argparse
 import sys
 import os
-import pandas as pd
-from . import data_loader
-from . import calculator
+from pathlib import Path
 from . import __version__
 
 # Determine default data file path relative to this script file
 DEFAULT_DATA_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'element_data.csv')
 DEFAULT_DATA_FILE = os.path.abspath(DEFAULT_DATA_FILE) # Get absolute path
 
+# Static parts of the results report
+_HEADER = "--- HEA Property Prediction Results ---"
+_SEP = "-" * 35
+_FOOTER_LINES = (
+    "IMPORTANT NOTES:",
+    " - These predictions are based on simplified Rule-of-Mixtures/Vegard's Law.",
+    " - Real HEA properties can deviate significantly due to phase formation,",
+    "   lattice distortion, electronic effects, and microstructure.",
+    " - Vegard's Law is most applicable when constituents share the same crystal structure.",
+    " - Thermal conductivity estimates are particularly rough approximations.",
+    " - Accuracy depends heavily on the quality of the input elemental data.",
+    " - Use these results for initial screening, not for final design.",
+)
+# Output precision of the batch CSV columns, matching the single-composition report
+_BATCH_DECIMALS = {'Density_g_cm3': 3, 'LatticeParameter_a_A': 4, 'ThermalConductivity_W_mK': 2}
+
 def main():
     parser = argparse.ArgumentParser(
         description=f"HEA Property Predictor (v{__version__}). Predicts basic properties of High Entropy Alloys "
@@ -21,11 +35,21 @@ def main():
     parser.add_argument(
         "composition",
         type=str,
+        nargs="?",
         help="Composition of the material in atomic fractions. \n"
              "Format: 'Elem1:frac1,Elem2:frac2,...' (e.g., 'Fe:0.2,Co:0.2,Ni:0.2,Cr:0.2,Mn:0.2').\n"
              "Fractions should ideally sum to 1.0 (will be normalized otherwise)."
     )
 
+    parser.add_argument(
+        "-b", "--batch",
+        type=str,
+        default=None,
+        help="Path to a CSV of compositions to evaluate in one run (instead of a single composition).\n"
+             "Columns are element symbols, each row is one composition in atomic fractions.\n"
+             "Results are written as CSV, one row per input composition."
+    )
+
     parser.add_argument(
         "-d", "--data",
         type=str,
@@ -47,10 +71,18 @@ def main():
     )
 
     args = parser.parse_args()
+    if (args.composition is None) == (args.batch is None):
+        parser.error("provide either a composition or --batch, but not both")
+
+    # Imported only after argument parsing so --help and --version skip the numpy import
+    from . import data_loader
+    from . import calculator
 
     # --- 1. Load Data ---
+    # A single composition is read without pandas; batch mode imports pandas for its input anyway
+    load = data_loader.load_element_data if args.batch else data_loader.load_element_data_fast
     try:
-        element_data = data_loader.load_element_data(args.data)
+        element_data = load(args.data)
         if element_data is None:
             sys.exit(1) # Error message already printed by loader
     except FileNotFoundError:
@@ -64,6 +96,10 @@ def main():
          sys.exit(1)
 
 
+    if args.batch:
+        _run_batch(args, element_data, data_loader, calculator)
+        return
+
     # --- 2. Parse Composition ---
     composition_dict = data_loader.parse_composition(args.composition)
     if composition_dict is None:
@@ -71,55 +107,52 @@ def main():
 
 
     # --- 3. Validate Elements ---
-    valid_elements = True
-    for element in composition_dict.keys():
-        if element not in element_data.index:
-            print(f"Error: Element '{element}' from composition not found in the data file '{args.data}'.", file=sys.stderr)
-            valid_elements = False
-    if not valid_elements:
+    positions = [element_data.sym_to_idx.get(element, -1) for element in composition_dict]
+    missing = [element for element, i in zip(composition_dict, positions) if i < 0]
+    for element in missing:
+        print(f"Error: Element '{element}' from composition not found in the data file '{args.data}'.", file=sys.stderr)
+    if missing:
         print("Please check element symbols in your composition or update the data file.", file=sys.stderr)
         sys.exit(1)
 
 
     # --- 4. Perform Calculations ---
     print("\n--- Calculating Properties ---")
-    predicted_density = calculator.calculate_density_rom(composition_dict, element_data)
-    lattice_param_result = calculator.calculate_lattice_parameter_vegard(composition_dict, element_data)
-    predicted_lattice_param, structures, _ = lattice_param_result # Unpack result
-    predicted_conductivity = calculator.calculate_thermal_conductivity_rom(composition_dict, element_data)
+    properties = calculator.calculate_all_properties(composition_dict, element_data, positions)
+    predicted_density = properties.density
+    predicted_lattice_param, structures = properties.lattice, properties.structures
+    predicted_conductivity = properties.thermal_k
+    if properties.warnings:
+        sys.stderr.write("\n".join(properties.warnings) + "\n")
 
     # --- 5. Display Results ---
-    results = []
-    results.append("--- HEA Property Prediction Results ---")
-    results.append(f"Input Composition (Atomic Fractions): {composition_dict}")
-    results.append("-" * 35)
-    results.append("Predicted Properties (Approximate):")
-
     if predicted_density is not None:
-        results.append(f"  Density (RoM):             {predicted_density:.3f} g/cm³")
+        density_line = f"  Density (RoM):             {predicted_density:.3f} g/cm³"
     else:
-        results.append("  Density (RoM):             Calculation Failed")
+        density_line = "  Density (RoM):             Calculation Failed"
 
     if predicted_lattice_param is not None:
          structure_info = f" (Based on structures: {', '.join(structures)})" if structures else " (Structure info missing/mixed)"
-         results.append(f"  Lattice Parameter (Vegard):  {predicted_lattice_param:.4f} Å {structure_info}")
+         lattice_line = f"  Lattice Parameter (Vegard):  {predicted_lattice_param:.4f} Å {structure_info}"
     else:
-         results.append( "  Lattice Parameter (Vegard):  Calculation Failed")
+         lattice_line = "  Lattice Parameter (Vegard):  Calculation Failed"
 
     if predicted_conductivity is not None:
-        results.append(f"  Thermal Conductivity (RoM): {predicted_conductivity:.2f} W/m·K")
+        conductivity_line = f"  Thermal Conductivity (RoM): {predicted_conductivity:.2f} W/m·K"
     else:
-        results.append( "  Thermal Conductivity (RoM): Calculation Failed")
-
-    results.append("-" * 35)
-    results.append("IMPORTANT NOTES:")
-    results.append(" - These predictions are based on simplified Rule-of-Mixtures/Vegard's Law.")
-    results.append(" - Real HEA properties can deviate significantly due to phase formation,")
-    results.append("   lattice distortion, electronic effects, and microstructure.")
-    results.append(" - Vegard's Law is most applicable when constituents share the same crystal structure.")
-    results.append(" - Thermal conductivity estimates are particularly rough approximations.")
-    results.append(" - Accuracy depends heavily on the quality of the input elemental data.")
-    results.append(" - Use these results for initial screening, not for final design.")
+        conductivity_line = "  Thermal Conductivity (RoM): Calculation Failed"
+
+    results = [
+        _HEADER,
+        f"Input Composition (Atomic Fractions): {composition_dict}",
+        _SEP,
+        "Predicted Properties (Approximate):",
+        density_line,
+        lattice_line,
+        conductivity_line,
+        _SEP,
+        *_FOOTER_LINES,
+    ]
 
     output_string = "\n".join(results)
     print(f"\n{output_string}\n") # Print to console regardless
@@ -127,10 +160,51 @@ def main():
     # --- 6. Save Output (Optional) ---
     if args.output:
         try:
-            with open(args.output, 'w') as f:
-                f.write(output_string + "\n")
+            Path(args.output).write_text(output_string + "\n", encoding="utf-8")
             print(f"Results saved to '{args.output}'")
-        except IOError as e:
+        except OSError as e:
+            print(f"Error: Could not write results to file '{args.output}': {e}", file=sys.stderr)
+
+
+def _run_batch(args, element_data, data_loader, calculator):
+    """
+    Evaluates every composition in the --batch CSV and prints/saves the results as CSV.
+    data_loader and calculator are the modules main() imported after argument parsing.
+    """
+    import pandas as pd
+
+    try:
+        fractions = data_loader.load_batch_compositions(args.batch)
+    except FileNotFoundError:
+        print(f"Error: Batch file not found at '{args.batch}'.", file=sys.stderr)
+        sys.exit(1)
+    if fractions is None:
+        sys.exit(1) # Error message already printed by loader
+
+    missing = [element for element in fractions.columns if element not in element_data.sym_to_idx]
+    for element in missing:
+        print(f"Error: Element '{element}' from batch file not found in the data file '{args.data}'.", file=sys.stderr)
+    if missing:
+        print("Please check the column names of your batch file or update the data file.", file=sys.stderr)
+        sys.exit(1)
+
+    properties = calculator.calculate_batch_properties(fractions, element_data)
+    if properties.warnings:
+        sys.stderr.write("\n".join(properties.warnings) + "\n")
+    results = pd.DataFrame({
+        'Density_g_cm3': properties.density,
+        'LatticeParameter_a_A': properties.lattice,
+        'Structures': properties.structures,
+        'ThermalConductivity_W_mK': properties.thermal_k,
+    }, index=fractions.index)
+    output_string = results.round(_BATCH_DECIMALS).to_csv()
+    print(output_string, end="")
+
+    if args.output:
+        try:
+            Path(args.output).write_text(output_string, encoding="utf-8")
+            print(f"Results saved to '{args.output}'", file=sys.stderr)
+        except OSError as e:
             print(f"Error: Could not write results to file '{args.output}': {e}", file=sys.stderr)
 
 
@@ -1,17 +1,109 @@
-import pandas as pd
+import numpy as np
+import csv
+import functools
+from dataclasses import dataclass
+import math
 import os
+import re
 import sys
 
-def load_element_data(filepath):
+# pandas is imported inside the DataFrame loaders so the single-composition CLI path never pays for it
+
+_REQUIRED_COLUMNS = [
+    'AtomicMass_amu', 'Density_g_cm3',
+    'CrystalStructure', 'LatticeParameter_a_A',
+    'ThermalConductivity_W_mK'
+]
+_NUMERIC_COLUMNS = ['AtomicMass_amu', 'Density_g_cm3', 'LatticeParameter_a_A', 'ThermalConductivity_W_mK']
+# pandas' default na_values, so the csv-module loader marks the same cells as missing
+_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+# Numeric cells read_csv's float parser accepts; float() alone also takes '1_000' and non-ASCII digits
+_FLOAT_RE = re.compile(r'\s*[-+]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|inf(?:inity)?)\s*', re.IGNORECASE | re.ASCII)
+
+# One 'Elem:frac' token plus its trailing separator; consecutive matches must tile the input.
+_COMPOSITION_RE = re.compile(r'\s*([A-Za-z]{1,3})\s*:\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(?:,|$)')
+
+
+@dataclass(frozen=True, slots=True)
+class ElementTable:
+    """
+    Column-oriented element property table: one contiguous float64 array per property,
+    all aligned with 'symbols'.
+
+    Attributes:
+        symbols (tuple): Element symbols in row order.
+        sym_to_idx (dict): {element_symbol: row index}.
+        mass, density, lattice, thermal_k (np.ndarray): Atomic mass (amu), density (g/cm³),
+            lattice parameter 'a' (Å) and thermal conductivity (W/m·K); NaN where missing.
+        structure (np.ndarray): Upper-cased crystal structure per element (object array, None if missing).
+    """
+    symbols: tuple
+    sym_to_idx: dict
+    mass: np.ndarray
+    density: np.ndarray
+    lattice: np.ndarray
+    structure: np.ndarray
+    thermal_k: np.ndarray
+
+    @classmethod
+    def build(cls, symbols, mass, density, lattice, structure, thermal_k):
+        """
+        Creates a table from per-column sequences; structures should already be upper-cased or None.
+        Structure names are interned, so the few distinct labels are shared objects across tables.
+        """
+        symbols = tuple(symbols)
+        return cls(
+            symbols=symbols,
+            sym_to_idx={sym: i for i, sym in enumerate(symbols)},
+            mass=np.ascontiguousarray(mass, dtype=np.float64),
+            density=np.ascontiguousarray(density, dtype=np.float64),
+            lattice=np.ascontiguousarray(lattice, dtype=np.float64),
+            structure=np.array([sys.intern(s) if s is not None else None for s in structure], dtype=object),
+            thermal_k=np.ascontiguousarray(thermal_k, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Converts a DataFrame in the load_element_data(legacy=True) layout."""
+        return cls.build(
+            df.index,
+            df['AtomicMass_amu'].to_numpy(dtype=np.float64),
+            df['Density_g_cm3'].to_numpy(dtype=np.float64),
+            df['LatticeParameter_a_A'].to_numpy(dtype=np.float64),
+            [_normalize_structure(s) for s in df['CrystalStructure']],
+            df['ThermalConductivity_W_mK'].to_numpy(dtype=np.float64),
+        )
+
+
+def _normalize_structure(value):
+    """Crystal structure label as stored in ElementTable: stripped and upper-cased, None if missing."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return None if value in _NA_VALUES else value.upper()
+
+
+def load_element_data(filepath, legacy=False):
     """
     Loads elemental property data from a CSV file.
 
+    Parsed tables are cached per (absolute path, modification time), so repeated
+    calls for an unchanged file return the same object without re-reading it.
+    Editing the file changes its mtime and triggers a fresh load. The returned
+    object is shared between callers and must be treated as read-only; take a
+    copy before modifying it.
+
     Args:
         filepath (str): Path to the CSV data file.
+        legacy (bool): Return the pandas DataFrame instead of an ElementTable.
 
     Returns:
-        pandas.DataFrame: DataFrame containing element properties, indexed by 'Symbol'.
-                          Returns None if the file cannot be loaded or is invalid.
+        ElementTable: Element properties as contiguous arrays (pandas.DataFrame indexed
+                      by 'Symbol' if legacy=True).
+                      Returns None if the file cannot be loaded or is invalid.
 
     Raises:
         FileNotFoundError: If the filepath does not exist.
@@ -20,28 +112,12 @@ def load_element_data(filepath):
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Error: Data file not found at '{filepath}'")
 
-    try:
-        df = pd.read_csv(filepath, comment='#') # Allow comments starting with #
-        df['Symbol'] = df['Symbol'].str.strip()
-        df.set_index('Symbol', inplace=True)
-
-        # --- Basic Validation ---
-        required_columns = [
-            'AtomicMass_amu', 'Density_g_cm3',
-            'CrystalStructure', 'LatticeParameter_a_A',
-            'ThermalConductivity_W_mK'
-        ]
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Error: Missing required columns in data file '{filepath}': {', '.join(missing_cols)}")
-
-        # Convert numeric columns, handling potential errors
-        numeric_cols = ['AtomicMass_amu', 'Density_g_cm3', 'LatticeParameter_a_A', 'ThermalConductivity_W_mK']
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce') # Convert non-numeric to NaN
-
-        return df
+    import pandas as pd
 
+    abspath = os.path.abspath(filepath)
+    try:
+        load = _load_cached if legacy else _load_table_cached
+        return load(abspath, os.stat(abspath).st_mtime_ns)
     except pd.errors.EmptyDataError:
         print(f"Error: Data file '{filepath}' is empty.", file=sys.stderr)
         return None
@@ -50,6 +126,126 @@ def load_element_data(filepath):
         return None
 
 
+@functools.lru_cache(maxsize=8)
+def _load_cached(abspath, mtime_ns):
+    """
+    Parses the data file. mtime_ns is only part of the cache key; failures raise and
+    are therefore never cached.
+    """
+    import pandas as pd
+
+    # --- Basic Validation ---
+    header = pd.read_csv(abspath, comment='#', nrows=0).columns # Allow comments starting with #
+    missing_cols = [col for col in ['Symbol', *_REQUIRED_COLUMNS] if col not in header]
+    if missing_cols:
+        raise ValueError(f"Error: Missing required columns in data file '{abspath}': {', '.join(missing_cols)}")
+
+    # Parse only the needed columns with their final dtypes in the C parser
+    usecols = ['Symbol', *_REQUIRED_COLUMNS]
+    dtype = {'Symbol': 'string', 'CrystalStructure': 'string', **{col: 'float64' for col in _NUMERIC_COLUMNS}}
+    try:
+        df = pd.read_csv(abspath, comment='#', usecols=usecols, dtype=dtype)
+    except ValueError:
+        # Some numeric cell is not a number; fall back to coercing those cells to NaN
+        df = pd.read_csv(abspath, comment='#', usecols=usecols, dtype={'Symbol': 'string', 'CrystalStructure': 'string'})
+        for col in _NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Interned symbols make the LUT and composition dict lookups hit the identity fast path
+    symbols = [sys.intern(sym) if isinstance(sym, str) else sym for sym in df.pop('Symbol').str.strip()]
+    df.index = pd.Index(symbols, dtype=object, name='Symbol')
+
+    return df
+
+
+@functools.lru_cache(maxsize=8)
+def _load_table_cached(abspath, mtime_ns):
+    """ElementTable view of _load_cached, cached under the same key."""
+    return ElementTable.from_dataframe(_load_cached(abspath, mtime_ns))
+
+
+def load_element_data_fast(filepath):
+    """
+    Loads elemental property data with the stdlib csv module, without importing pandas.
+
+    Intended for single-composition runs where building a DataFrame costs more than the
+    calculation itself. Same caching and error contract as load_element_data.
+
+    Args:
+        filepath (str): Path to the CSV data file.
+
+    Returns:
+        ElementTable: Same content as load_element_data(filepath); rows without a Symbol
+                      are skipped.
+                      Returns None if the file cannot be loaded or is invalid.
+
+    Raises:
+        FileNotFoundError: If the filepath does not exist.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Error: Data file not found at '{filepath}'")
+
+    abspath = os.path.abspath(filepath)
+    try:
+        return _load_fast_cached(abspath, os.stat(abspath).st_mtime_ns)
+    except Exception as e:
+        print(f"Error loading data from '{filepath}': {e}", file=sys.stderr)
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def _load_fast_cached(abspath, mtime_ns):
+    """csv.DictReader counterpart of _load_cached."""
+    with open(abspath, newline='', encoding='utf-8-sig') as f: # Excel 'CSV UTF-8' files start with a BOM
+        reader = csv.DictReader(_strip_comments(f)) # Lines left blank are skipped
+        if reader.fieldnames is None:
+            raise ValueError("Data file is empty.")
+        # Header names are matched verbatim, as read_csv does
+        missing_cols = [col for col in ['Symbol', *_REQUIRED_COLUMNS] if col not in reader.fieldnames]
+        if missing_cols:
+            raise ValueError(f"Error: Missing required columns in data file '{abspath}': {', '.join(missing_cols)}")
+
+        symbols = []
+        columns = {col: [] for col in _NUMERIC_COLUMNS}
+        structures = []
+        for row in reader:
+            symbol = (row['Symbol'] or '').strip()
+            if not symbol:
+                continue
+            symbols.append(sys.intern(symbol))
+            for col in _NUMERIC_COLUMNS:
+                columns[col].append(_to_float(row[col]))
+            structures.append(_normalize_structure(row['CrystalStructure']))
+
+    return ElementTable.build(
+        symbols,
+        columns['AtomicMass_amu'],
+        columns['Density_g_cm3'],
+        columns['LatticeParameter_a_A'],
+        structures,
+        columns['ThermalConductivity_W_mK'],
+    )
+
+
+def _strip_comments(lines):
+    """Cuts each line at the first '#' outside double quotes, like read_csv(comment='#')."""
+    quoted = False # Carried over lines so multi-line quoted fields keep their '#'
+    for line in lines:
+        for i, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == '#' and not quoted:
+                line = line[:i]
+                break
+        yield line
+
+
+def _to_float(value):
+    """Parses a numeric cell the way read_csv does; blanks and anything else become NaN."""
+    if value is None or not _FLOAT_RE.fullmatch(value):
+        return math.nan
+    return float(value)
+
+
 def parse_composition(composition_str):
     """
     Parses the composition string (e.g., "Fe:0.6,Ni:0.4") into a dictionary.
@@ -62,39 +258,117 @@ def parse_composition(composition_str):
               Returns None if parsing fails or fractions don't sum close to 1.0.
     """
     composition = {}
-    total_fraction = 0.0
     try:
-        parts = composition_str.split(',')
-        if not parts or parts == ['']:
+        if not composition_str.strip():
              raise ValueError("Composition string is empty.")
 
-        for part in parts:
-            element, fraction_str = part.strip().split(':')
-            element = element.strip()
-            fraction = float(fraction_str.strip())
+        position = 0
+        for match in _COMPOSITION_RE.finditer(composition_str):
+            if match.start() != position:
+                break # Unparseable text between tokens
+            position = match.end()
+            element, fraction = sys.intern(match.group(1)), float(match.group(2))
 
-            if not element:
-                raise ValueError("Element symbol cannot be empty.")
             if fraction < 0 or fraction > 1:
                 raise ValueError(f"Fraction for {element} ({fraction}) must be between 0 and 1.")
             if element in composition:
                 raise ValueError(f"Duplicate element '{element}' found in composition.")
 
             composition[element] = fraction
-            total_fraction += fraction
-
-        # Check if fractions sum close to 1.0
-        if not (0.999 < total_fraction < 1.001):
-            print(f"Warning: Input fractions sum to {total_fraction:.4f}. They will be normalized.", file=sys.stderr)
-            # Normalize fractions
-            normalized_composition = {el: frac / total_fraction for el, frac in composition.items()}
-            return normalized_composition
-        else:
+
+        if position == len(composition_str) and composition_str.rstrip().endswith(','):
+            raise ValueError("Composition string has a trailing comma.")
+        if position != len(composition_str):
+            raise ValueError(f"Invalid entry near '{composition_str[position:].strip()}'. Expected 'Elem:frac' pairs separated by commas.")
+
+        # Check if fractions sum close to 1.0; already-normalized input is returned untouched
+        total_fraction = math.fsum(composition.values())
+        if abs(total_fraction - 1.0) < 1e-3:
             return composition
+        if total_fraction == 0:
+            raise ValueError("Fractions sum to zero and cannot be normalized.")
+
+        print(f"Warning: Input fractions sum to {total_fraction:.4f}. They will be normalized.", file=sys.stderr)
+        fractions = np.fromiter(composition.values(), dtype=np.float64, count=len(composition))
+        return dict(zip(composition, (fractions / total_fraction).tolist()))
 
     except ValueError as e:
         print(f"Error parsing composition string '{composition_str}': {e}", file=sys.stderr)
         return None
     except Exception as e:
         print(f"Unexpected error parsing composition string '{composition_str}': {e}", file=sys.stderr)
-        return None
\ No newline at end of file
+        return None
+
+
+def load_batch_compositions(filepath):
+    """
+    Loads a table of compositions for batch evaluation.
+
+    The CSV has one column per element symbol and one row per composition, with
+    atomic fractions as values. Blank cells count as 0. Rows that do not sum close
+    to 1.0 are normalized.
+
+    Args:
+        filepath (str): Path to the batch CSV file.
+
+    Returns:
+        pandas.DataFrame: float64 fractions, one row per composition (1-based 'Row' index),
+                          columns are element symbols.
+                          Returns None if the file cannot be parsed or contains invalid fractions.
+
+    Raises:
+        FileNotFoundError: If the filepath does not exist.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Error: Batch file not found at '{filepath}'")
+
+    import pandas as pd
+
+    try:
+        # read_csv renames repeated headers (Fe, Fe.1) and blank ones (Unnamed: 2), so check the raw header row first
+        header = pd.read_csv(filepath, comment='#', header=None, nrows=1, dtype=str, keep_default_na=False).iloc[0]
+        seen = set()
+        blank = []
+        for position, col in enumerate(header):
+            symbol = col.strip()
+            if not symbol:
+                blank.append(position)
+            elif symbol in seen:
+                raise ValueError(f"Duplicate element '{symbol}' found in batch file.")
+            seen.add(symbol)
+
+        batch = pd.read_csv(filepath, comment='#', index_col=False) # Allow comments starting with #
+        if batch.empty:
+            raise ValueError("No compositions found.")
+        # A blank header (e.g. from a trailing comma) is only allowed on an empty column
+        for position in blank:
+            if batch.iloc[:, position].notna().any():
+                raise ValueError(f"Column {position + 1} has fractions but no element symbol.")
+        batch = batch.drop(columns=batch.columns[blank])
+        symbols = [sys.intern(str(col).strip()) for col in batch.columns]
+        fractions = batch.fillna(0.0).to_numpy(dtype=np.float64)
+
+        out_of_range = (fractions < 0) | (fractions > 1)
+        if out_of_range.any():
+            row, col = np.argwhere(out_of_range)[0]
+            raise ValueError(f"Fraction for {symbols[col]} in row {row + 1} ({fractions[row, col]}) must be between 0 and 1.")
+
+        totals = fractions.sum(axis=1)
+        if (totals == 0).any():
+            raise ValueError(f"Fractions in row {int(np.argmax(totals == 0)) + 1} sum to zero and cannot be normalized.")
+        off = np.abs(totals - 1.0) >= 1e-3
+        if off.any():
+            print(f"Warning: {int(off.sum())} composition row(s) do not sum to 1.0. They will be normalized.", file=sys.stderr)
+            fractions = fractions / totals[:, np.newaxis]
+
+        return pd.DataFrame(fractions, index=pd.RangeIndex(1, len(batch) + 1, name='Row'), columns=symbols)
+
+    except pd.errors.EmptyDataError:
+        print(f"Error: Batch file '{filepath}' is empty.", file=sys.stderr)
+        return None
+    except ValueError as e:
+        print(f"Error parsing batch file '{filepath}': {e}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"Unexpected error reading batch file '{filepath}': {e}", file=sys.stderr)
+        return None